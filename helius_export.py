@@ -3,21 +3,84 @@ import os
 import sys
 import json
 import csv
-import time
-from typing import Any, Dict, List, Optional, Set, Tuple
-from datetime import datetime
-
-import requests
-from dateutil import parser as dateparser
-from tqdm import tqdm
+import io
+import random
+import asyncio
+import sqlite3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Deque, Dict, FrozenSet, Iterator, List, Optional, Set, TextIO, Tuple
+from datetime import datetime, timezone
+
+import aiohttp
+import orjson
+from aiolimiter import AsyncLimiter
+from tqdm.asyncio import tqdm
 
 HELIUS_BASE = "https://api.helius.xyz/v0"
+HELIUS_RPC = "https://mainnet.helius-rpc.com/"
+# Max simultaneous HTTP connections shared by all wallet fetches
+MAX_CONNECTIONS = 32
+# Seconds an idle pooled connection is kept open for reuse
+KEEPALIVE_TIMEOUT = 60
+# Seconds resolved Helius hostnames are cached
+DNS_CACHE_TTL = 300
+# Default cap on Helius requests per second across all wallets
+DEFAULT_RPS = 50.0
+# Statuses retried besides 5xx (rate limited)
+RETRY_STATUSES: FrozenSet[int] = frozenset({429})
+# Cap on a single retry sleep, computed or from Retry-After
+MAX_RETRY_SLEEP = 30.0
+# getSignaturesForAddress returns at most 1000 signatures per call
+SIGNATURE_PAGE_SIZE = 1000
+# POST /v0/transactions parses at most 100 signatures per call
+PARSE_BATCH_SIZE = 100
+# Max in-flight parse requests per wallet
+PARSE_CONCURRENCY = 8
+# On-disk cache of enriched transactions keyed by signature
+DEFAULT_CACHE_PATH = os.path.join("~", ".helius_cache", "transactions.sqlite3")
+# Signatures per cache lookup query, below SQLite's bound-parameter limit
+CACHE_LOOKUP_CHUNK = 500
+
+CSV_HEADER: Tuple[str, ...] = (
+	"timestamp",
+	"txid",
+	"program_id",
+	"program_source",
+	"helius_type",
+	"derived_type",
+	"asset",
+	"amount",
+	"fee_sol",
+	"is_self_transfer",
+	"spam_flag",
+	"from",
+	"to",
+	"description",
+	"cost_basis_usd",
+)
+
+# 10**d for token decimals; SPL mints practically never exceed 19
+POW10: Tuple[int, ...] = tuple(10 ** d for d in range(20))
+
+# Diagnostic description column formatters, bound once
+DESC_FMT = "program=%s type=%s mint=%s".__mod__
+DESC_NO_MINT_FMT = "program=%s type=%s".__mod__
+
+# Output file buffer; rows reach disk in large writes rather than per row
+OUTPUT_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Helius type values (lowercased) that decide the derived type on their own
+SWAP_CATEGORIES: FrozenSet[str] = frozenset({"swap"})
+NFT_CATEGORIES: FrozenSet[str] = frozenset({"nft", "nft_sale", "nft_mint"})
+STAKE_CATEGORIES: FrozenSet[str] = frozenset({"stake", "unstake"})
 
 # Common Bubblegum program ids (mainnet variants observed)
-BUBBLEGUM_PROGRAM_IDS: Set[str] = {
+BUBBLEGUM_PROGRAM_IDS: FrozenSet[str] = frozenset({
 	"BGUMApV3npVqfY3VhXv9Gqz3r3Gq5h5xQmYkYw2nVBoz",  # placeholder variant
 	"BGUMAp7x2hAqHcC1EHnHCqB6fN5teLo75fW4rWuBbY",    # placeholder variant
-}
+})
 
 
 def load_wallets(path: str) -> List[str]:
@@ -28,125 +91,251 @@ def load_wallets(path: str) -> List[str]:
 	return wallets
 
 
+def open_tx_cache(path: str) -> sqlite3.Connection:
+	"""Open (creating if needed) the enriched transaction cache at path.
+	Finalized transactions never change, so entries are kept forever.
+	"""
+	path = os.path.expanduser(path)
+	parent = os.path.dirname(path)
+	if parent:
+		os.makedirs(parent, exist_ok=True)
+	conn = sqlite3.connect(path)
+	conn.execute("CREATE TABLE IF NOT EXISTS transactions (signature TEXT PRIMARY KEY, body BLOB NOT NULL)")
+	conn.commit()
+	return conn
+
+
+def cache_get_many(cache: sqlite3.Connection, signatures: List[str]) -> Dict[str, Dict[str, Any]]:
+	found: Dict[str, Dict[str, Any]] = {}
+	for i in range(0, len(signatures), CACHE_LOOKUP_CHUNK):
+		chunk = signatures[i:i + CACHE_LOOKUP_CHUNK]
+		placeholders = ",".join("?" * len(chunk))
+		rows = cache.execute(f"SELECT signature, body FROM transactions WHERE signature IN ({placeholders})", chunk)
+		for sig, body in rows:
+			found[sig] = orjson.loads(body)
+	return found
+
+
+def cache_put_many(cache: sqlite3.Connection, transactions: List[Dict[str, Any]]) -> None:
+	cache.executemany(
+		"INSERT OR REPLACE INTO transactions (signature, body) VALUES (?, ?)",
+		[(tx["signature"], orjson.dumps(tx)) for tx in transactions if tx.get("signature")],
+	)
+	cache.commit()
+
+
+@lru_cache(maxsize=512)
+def _norm(s: Optional[str]) -> str:
+	"""Lowercase a Helius type/source string; the set of distinct values is small."""
+	return (s or "").lower()
+
+
 def iso_to_unix_ms(iso_time: str) -> int:
-	return int(dateparser.isoparse(iso_time).timestamp() * 1000)
+	# fromisoformat only accepts a trailing "Z" from Python 3.11 on
+	return int(datetime.fromisoformat(iso_time.replace("Z", "+00:00")).timestamp() * 1000)
 
 
 def unix_ms_to_iso(ms: int) -> str:
-	return datetime.utcfromtimestamp(ms / 1000).isoformat() + "Z"
+	# Swap the fixed "+00:00" offset of a UTC isoformat() for "Z"
+	return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()[:-6] + "Z"
 
 
-def request_with_retries(url: str, method: str = "GET", params: Optional[Dict[str, Any]] = None, json_body: Optional[Dict[str, Any]] = None, timeout: int = 30, max_retries: int = 5, backoff: float = 0.8) -> requests.Response:
+def make_limiter(rps: float) -> AsyncLimiter:
+	"""Token bucket allowing rps requests per second.
+	The bucket must hold at least one token, so rates below 1/s become one
+	request per 1/rps seconds.
+	"""
+	if rps < 1:
+		return AsyncLimiter(1, 1 / rps)
+	return AsyncLimiter(rps, 1)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+	"""Seconds from a delta-seconds Retry-After header; HTTP-date values are ignored."""
+	if not value:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		return None
+
+
+async def request_with_retries(session: aiohttp.ClientSession, url: str, method: str = "GET", params: Optional[Dict[str, Any]] = None, json_body: Optional[Dict[str, Any]] = None, timeout: int = 30, max_retries: int = 5, backoff: float = 0.5, limiter: Optional[AsyncLimiter] = None) -> aiohttp.ClientResponse:
+	"""Issue a request, retrying connection errors, timeouts, 429 and 5xx responses.
+	Between attempts it sleeps for the server's Retry-After if given, otherwise
+	backoff * 2**attempt plus up to 0.25s of jitter so concurrent callers spread out.
+	Every attempt, retries included, first takes a slot from limiter when given.
+	The body is read before returning so the connection goes back to the pool;
+	callers can still use resp.read()/resp.text() on the returned response.
+	"""
+	client_timeout = aiohttp.ClientTimeout(total=timeout)
 	for attempt in range(max_retries):
+		retry_after: Optional[float] = None
 		try:
+			if limiter is not None:
+				await limiter.acquire()
 			if method.upper() == "GET":
-				resp = requests.get(url, params=params, timeout=timeout)
+				resp = await session.get(url, params=params, timeout=client_timeout)
 			else:
-				resp = requests.post(url, params=params, json=json_body, timeout=timeout)
-			if resp.status_code >= 500:
-				raise requests.HTTPError(f"Server error {resp.status_code}")
-			return resp
-		except (requests.ConnectionError, requests.Timeout, requests.HTTPError):
-			sleep_s = (backoff ** attempt) * 1.0
-			time.sleep(min(10.0, sleep_s))
-	raise RuntimeError("Exhausted retries")
-
-
-def fetch_enriched_transactions(api_key: str, wallet: str, limit: int = 1000, start_time_ms: Optional[int] = None, end_time_ms: Optional[int] = None) -> List[Dict[str, Any]]:
-	"""Fetch enriched transactions for a single wallet with pagination.
-	Helius GET /v0/addresses/{address}/transactions does not accept a 'limit' query param here,
-	so we only use 'before' and stop locally when reaching 'limit'.
+				resp = await session.post(url, params=params, json=json_body, timeout=client_timeout)
+			await resp.read()
+			if resp.status < 500 and resp.status not in RETRY_STATUSES:
+				return resp
+			retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+		except (aiohttp.ClientError, asyncio.TimeoutError):
+			pass
+		if attempt + 1 < max_retries:
+			sleep_s = retry_after if retry_after is not None else backoff * (2 ** attempt) + random.uniform(0, 0.25)
+			await asyncio.sleep(min(MAX_RETRY_SLEEP, sleep_s))
+	raise RuntimeError(f"Exhausted retries for {url}")
+
+
+async def list_signatures(session: aiohttp.ClientSession, api_key: str, wallet: str, limit: int = 1000, start_time_ms: Optional[int] = None, end_time_ms: Optional[int] = None, limiter: Optional[AsyncLimiter] = None) -> List[str]:
+	"""List signatures for a wallet, newest first, via RPC getSignaturesForAddress.
+	Pages are walked serially on 'before'; the time window is applied locally
+	using each signature's blockTime, stopping once we pass start_time_ms.
 	"""
-	transactions: List[Dict[str, Any]] = []
-	before: Optional[str] = None  # signature to paginate older
-	fetched = 0
-	while True:
-		if fetched >= limit:
-			break
-		params: Dict[str, Any] = {"api-key": api_key}
+	signatures: List[str] = []
+	before: Optional[str] = None
+	while len(signatures) < limit:
+		opts: Dict[str, Any] = {"limit": SIGNATURE_PAGE_SIZE}
 		if before:
-			params["before"] = before
-		if start_time_ms is not None:
-			params["startTime"] = start_time_ms
-		if end_time_ms is not None:
-			params["endTime"] = end_time_ms
-		url = f"{HELIUS_BASE}/addresses/{wallet}/transactions"
-		resp = request_with_retries(url, params=params)
-		if resp.status_code != 200:
-			raise RuntimeError(f"Helius error {resp.status_code}: {resp.text}")
-		batch = resp.json()
-		if not isinstance(batch, list) or len(batch) == 0:
+			opts["before"] = before
+		body = {"jsonrpc": "2.0", "id": 1, "method": "getSignaturesForAddress", "params": [wallet, opts]}
+		resp = await request_with_retries(session, HELIUS_RPC, method="POST", params={"api-key": api_key}, json_body=body, limiter=limiter)
+		if resp.status != 200:
+			raise RuntimeError(f"Helius RPC error {resp.status}: {await resp.text()}")
+		payload = orjson.loads(await resp.read())
+		if payload.get("error"):
+			raise RuntimeError(f"Helius RPC error: {payload['error']}")
+		page = payload.get("result") or []
+		if not page:
 			break
-		transactions.extend(batch)
-		fetched += len(batch)
-		before = batch[-1].get("signature")
-		if not before:
+		for entry in page:
+			block_ms = entry["blockTime"] * 1000 if entry.get("blockTime") else None
+			if block_ms is not None:
+				if start_time_ms is not None and block_ms < start_time_ms:
+					return signatures
+				if end_time_ms is not None and block_ms >= end_time_ms:
+					continue
+			signatures.append(entry["signature"])
+			if len(signatures) >= limit:
+				break
+		if len(page) < SIGNATURE_PAGE_SIZE:
 			break
-	return transactions[:limit]
-
-
-def is_self_transfer(our_wallets: Set[str], tx: Dict[str, Any]) -> bool:
-	addrs: Set[str] = set()
-	for nt in tx.get("nativeTransfers", []) or []:
-		if nt.get("fromUserAccount"):
-			addrs.add(nt["fromUserAccount"])
-		if nt.get("toUserAccount"):
-			addrs.add(nt["toUserAccount"])
-	for tt in tx.get("tokenTransfers", []) or []:
-		if tt.get("fromUserAccount"):
-			addrs.add(tt["fromUserAccount"])
-		if tt.get("toUserAccount"):
-			addrs.add(tt["toUserAccount"])
-	inter = addrs.intersection(our_wallets)
-	return len(inter) >= 2
-
-
-def sum_amounts_relative_to_wallets(our_wallets: Set[str], tx: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
-	"""Return list of per-asset movements and fee in lamports (SOL).
+		before = page[-1]["signature"]
+	return signatures
+
+
+async def parse_transactions(session: aiohttp.ClientSession, api_key: str, signatures: List[str], limiter: Optional[AsyncLimiter] = None) -> List[Dict[str, Any]]:
+	"""Fetch enriched transactions for up to PARSE_BATCH_SIZE signatures."""
+	url = f"{HELIUS_BASE}/transactions"
+	resp = await request_with_retries(session, url, method="POST", params={"api-key": api_key}, json_body={"transactions": signatures}, limiter=limiter)
+	if resp.status != 200:
+		raise RuntimeError(f"Helius error {resp.status}: {await resp.text()}")
+	batch = orjson.loads(await resp.read())
+	if not isinstance(batch, list):
+		raise RuntimeError(f"Unexpected Helius response: {await resp.text()}")
+	return batch
+
+
+async def fetch_enriched_transactions(session: aiohttp.ClientSession, api_key: str, signatures: List[str], cache: Optional[sqlite3.Connection] = None, limiter: Optional[AsyncLimiter] = None) -> List[Dict[str, Any]]:
+	"""Fetch enriched transactions for signatures, returned in the same order.
+	Signatures not already in cache are parsed in batches of PARSE_BATCH_SIZE
+	with up to PARSE_CONCURRENCY batches in flight.
+	"""
+	by_sig = cache_get_many(cache, signatures) if cache is not None else {}
+	missing = [sig for sig in signatures if sig not in by_sig]
+	semaphore = asyncio.Semaphore(PARSE_CONCURRENCY)
+
+	async def parse_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+		async with semaphore:
+			batch = await parse_transactions(session, api_key, chunk, limiter=limiter)
+		if cache is not None:
+			cache_put_many(cache, batch)
+		return batch
+
+	chunks = [missing[i:i + PARSE_BATCH_SIZE] for i in range(0, len(missing), PARSE_BATCH_SIZE)]
+	for batch in await asyncio.gather(*(parse_chunk(c) for c in chunks)):
+		for tx in batch:
+			by_sig[tx.get("signature")] = tx
+	return [by_sig[sig] for sig in signatures if sig in by_sig]
+
+
+def analyze_tx(our_wallets: FrozenSet[str], tx: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int, bool]:
+	"""Walk a tx's transfers once and return (movements, fee in lamports, is_self).
 	Each movement includes asset, amount, decimals, mint, from_user, to_user.
 	Positive amount means incoming to our wallets; negative is outgoing.
+	is_self is True when two or more distinct wallets of ours appear in the transfers.
+	Account strings are interned: counterparties repeat heavily across a wallet's history.
 	"""
 	movements: List[Dict[str, Any]] = []
+	seen_ours: Set[str] = set()
 	# Native SOL
 	for nt in tx.get("nativeTransfers", []) or []:
-		lamports = int(nt.get("amount", 0))
 		from_acct = nt.get("fromUserAccount")
 		to_acct = nt.get("toUserAccount")
-		if to_acct in our_wallets and from_acct not in our_wallets:
-			movements.append({
-				"asset": "SOL", "mint": None, "decimals": 9,
-				"amount": lamports / 1e9,
-				"from_user": from_acct, "to_user": to_acct,
-			})
-		elif from_acct in our_wallets and to_acct not in our_wallets:
-			movements.append({
-				"asset": "SOL", "mint": None, "decimals": 9,
-				"amount": -lamports / 1e9,
-				"from_user": from_acct, "to_user": to_acct,
-			})
+		from_acct = sys.intern(from_acct) if from_acct else from_acct
+		to_acct = sys.intern(to_acct) if to_acct else to_acct
+		from_ours = from_acct in our_wallets
+		to_ours = to_acct in our_wallets
+		if from_ours:
+			seen_ours.add(from_acct)
+		if to_ours:
+			seen_ours.add(to_acct)
+		# +1 incoming, -1 outgoing, 0 when both or neither side is ours
+		sign = to_ours - from_ours
+		if not sign:
+			continue
+		lamports = int(nt.get("amount", 0))
+		movements.append({
+			"asset": "SOL", "mint": None, "decimals": 9,
+			"amount": sign * lamports / 1e9,
+			"from_user": from_acct, "to_user": to_acct,
+		})
 	# Tokens
 	for tt in tx.get("tokenTransfers", []) or []:
+		from_acct = tt.get("fromUserAccount")
+		to_acct = tt.get("toUserAccount")
+		from_acct = sys.intern(from_acct) if from_acct else from_acct
+		to_acct = sys.intern(to_acct) if to_acct else to_acct
+		from_ours = from_acct in our_wallets
+		to_ours = to_acct in our_wallets
+		if from_ours:
+			seen_ours.add(from_acct)
+		if to_ours:
+			seen_ours.add(to_acct)
+		sign = to_ours - from_ours
+		if not sign:
+			continue
 		amt_raw = int(tt.get("tokenAmount", 0))
 		dec = int(tt.get("tokenDecimals", 0) or 0)
 		mint = tt.get("mint")
 		sym = (tt.get("tokenSymbol") or mint or "TOKEN").upper()
-		from_acct = tt.get("fromUserAccount")
-		to_acct = tt.get("toUserAccount")
-		amount_adj = amt_raw / (10 ** dec if dec else 1)
-		if to_acct in our_wallets and from_acct not in our_wallets:
-			movements.append({
-				"asset": sym, "mint": mint, "decimals": dec,
-				"amount": amount_adj,
-				"from_user": from_acct, "to_user": to_acct,
-			})
-		elif from_acct in our_wallets and to_acct not in our_wallets:
-			movements.append({
-				"asset": sym, "mint": mint, "decimals": dec,
-				"amount": -amount_adj,
-				"from_user": from_acct, "to_user": to_acct,
-			})
+		scale = POW10[dec] if 0 <= dec < len(POW10) else 10 ** dec
+		movements.append({
+			"asset": sym, "mint": mint, "decimals": dec,
+			"amount": sign * amt_raw / scale,
+			"from_user": from_acct, "to_user": to_acct,
+		})
 	fee_lamports = int((tx.get("fee") or 0))
-	return movements, fee_lamports
+	return movements, fee_lamports, len(seen_ours) >= 2
+
+
+@lru_cache(maxsize=1024)
+def _classify(helius_type: Optional[str], source: Optional[str]) -> Optional[str]:
+	"""Derived type implied by a tx's Helius type and source alone, else None.
+	There are few distinct (type, source) pairs, so each is only classified once.
+	"""
+	category = _norm(helius_type)
+	source = _norm(source)
+	if "swap" in source or category in SWAP_CATEGORIES:
+		return "trade"
+	if category in NFT_CATEGORIES or "nft" in source:
+		return "nft"
+	if "stake" in source or category in STAKE_CATEGORIES:
+		return "staking"
+	return None
 
 
 def derive_transaction_type(tx: Dict[str, Any], is_self: bool, movements: List[Dict[str, Any]], spam_flag: bool) -> str:
@@ -154,14 +343,9 @@ def derive_transaction_type(tx: Dict[str, Any], is_self: bool, movements: List[D
 		return "spam_cnft"
 	if is_self:
 		return "transfer_internal"
-	category = (tx.get("type") or "").lower()
-	source = (tx.get("source") or "").lower()
-	if "swap" in source or category == "swap":
-		return "trade"
-	if category in {"nft", "nft_sale", "nft_mint"} or "nft" in source:
-		return "nft"
-	if "stake" in source or category in {"stake", "unstake"}:
-		return "staking"
+	dtype = _classify(tx.get("type"), tx.get("source"))
+	if dtype is not None:
+		return dtype
 	net = sum(m.get("amount", 0.0) for m in movements if isinstance(m.get("amount"), (int, float)))
 	if net > 0:
 		return "income"
@@ -183,9 +367,10 @@ def get_primary_program_id(tx: Dict[str, Any]) -> str:
 	return ""
 
 
-def is_bubblegum_spam(tx: Dict[str, Any], movements: List[Dict[str, Any]]) -> bool:
-	source = (tx.get("source") or "").lower()
-	pid = get_primary_program_id(tx)
+def is_bubblegum_spam(tx: Dict[str, Any], movements: List[Dict[str, Any]], program_id: Optional[str] = None) -> bool:
+	"""program_id may be passed when the caller already resolved it for tx."""
+	source = _norm(tx.get("source"))
+	pid = get_primary_program_id(tx) if program_id is None else program_id
 	is_bg = ("bubblegum" in source) or (pid in BUBBLEGUM_PROGRAM_IDS)
 	if not is_bg:
 		return False
@@ -194,82 +379,141 @@ def is_bubblegum_spam(tx: Dict[str, Any], movements: List[Dict[str, Any]]) -> bo
 	return abs(sol_net) <= 0.00001
 
 
-def write_csv(rows: List[Dict[str, Any]], output_path: str) -> None:
-	fieldnames = [
-		"timestamp",
-		"txid",
-		"program_id",
-		"program_source",
-		"helius_type",
-		"derived_type",
-		"asset",
-		"amount",
-		"fee_sol",
-		"is_self_transfer",
-		"spam_flag",
-		"from",
-		"to",
-		"description",
-		"cost_basis_usd",
-	]
-	with open(output_path, "w", newline="", encoding="utf-8") as f:
-		writer = csv.DictWriter(f, fieldnames=fieldnames)
-		writer.writeheader()
-		for r in rows:
-			writer.writerow(r)
-
-
-def build_rows_for_wallet(api_key: str, wallet: str, our_wallets: Set[str], start_ms: Optional[int], end_ms: Optional[int], limit: int) -> List[Dict[str, Any]]:
-	rows: List[Dict[str, Any]] = []
-	transactions = fetch_enriched_transactions(api_key, wallet, limit=limit, start_time_ms=start_ms, end_time_ms=end_ms)
+def open_csv_output(output_path: str) -> TextIO:
+	"""Open output_path for writing and emit the header row.
+	Rows are appended as CSV text chunks from render_rows_csv.
+	The caller owns the returned file and must close it.
+	"""
+	raw = open(output_path, "wb", buffering=OUTPUT_BUFFER_SIZE)
+	f = io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=False)
+	csv.writer(f).writerow(CSV_HEADER)
+	return f
+
+
+def build_rows_for_wallet(our_wallets: FrozenSet[str], transactions: List[Dict[str, Any]], include_description: bool = True) -> Iterator[Tuple[Any, ...]]:
+	"""Yield CSV rows as tuples in CSV_HEADER order.
+	The description column is left empty unless include_description is set.
+	"""
 	for tx in transactions:
-		movements, fee_lamports = sum_amounts_relative_to_wallets(our_wallets, tx)
-		is_self = is_self_transfer(our_wallets, tx)
-		spam_flag = is_bubblegum_spam(tx, movements)
+		movements, fee_lamports, is_self = analyze_tx(our_wallets, tx)
+		program_id = get_primary_program_id(tx)
+		spam_flag = is_bubblegum_spam(tx, movements, program_id)
 		dtype = derive_transaction_type(tx, is_self, movements, spam_flag)
 		timestamp_ms = int(tx.get("timestamp", 0)) * 1000 if tx.get("timestamp") and tx.get("timestamp") < 10**12 else int(tx.get("timestamp", 0))
 		iso_ts = unix_ms_to_iso(timestamp_ms) if timestamp_ms else ""
-		program_id = get_primary_program_id(tx)
 		source = tx.get("source") or ""
 		helius_type = tx.get("type") or ""
+		signature = tx.get("signature", "")
+		# Constant for every row of this tx
+		fee_sol = fee_lamports / 1e9 if fee_lamports else 0
+		is_self_s = "true" if is_self else "false"
+		spam_s = "true" if spam_flag else "false"
 		if not movements:
-			rows.append({
-				"timestamp": iso_ts,
-				"txid": tx.get("signature", ""),
-				"program_id": program_id,
-				"program_source": source,
-				"helius_type": helius_type,
-				"derived_type": dtype,
-				"asset": "",
-				"amount": 0,
-				"fee_sol": fee_lamports / 1e9 if fee_lamports else 0,
-				"is_self_transfer": str(is_self).lower(),
-				"spam_flag": str(spam_flag).lower(),
-				"from": "",
-				"to": "",
-				"description": f"program={source} type={helius_type}",
-				"cost_basis_usd": "",
-			})
+			yield (
+				iso_ts,
+				signature,
+				program_id,
+				source,
+				helius_type,
+				dtype,
+				"",
+				0,
+				fee_sol,
+				is_self_s,
+				spam_s,
+				"",
+				"",
+				DESC_NO_MINT_FMT((source, helius_type)) if include_description else "",
+				"",
+			)
 			continue
 		for m in movements:
-			rows.append({
-				"timestamp": iso_ts,
-				"txid": tx.get("signature", ""),
-				"program_id": program_id,
-				"program_source": source,
-				"helius_type": helius_type,
-				"derived_type": dtype,
-				"asset": m.get("asset", ""),
-				"amount": m.get("amount", 0),
-				"fee_sol": fee_lamports / 1e9 if fee_lamports else 0,
-				"is_self_transfer": str(is_self).lower(),
-				"spam_flag": str(spam_flag).lower(),
-				"from": m.get("from_user", ""),
-				"to": m.get("to_user", ""),
-				"description": f"program={source} type={helius_type} mint={m.get('mint')}",
-				"cost_basis_usd": "",
-			})
-	return rows
+			yield (
+				iso_ts,
+				signature,
+				program_id,
+				source,
+				helius_type,
+				dtype,
+				m["asset"],
+				m["amount"],
+				fee_sol,
+				is_self_s,
+				spam_s,
+				m["from_user"],
+				m["to_user"],
+				DESC_FMT((source, helius_type, m["mint"])) if include_description else "",
+				"",
+			)
+
+
+def render_rows_csv(our_wallets: FrozenSet[str], transactions: List[Dict[str, Any]], include_description: bool = True) -> Tuple[str, int]:
+	"""Render a wallet's rows to CSV text; returns (text, row count).
+	May run in a worker process, in which case both the transactions and the
+	returned text are pickled across; only worth it for large exports.
+	"""
+	# Unpickled strings are not interned; restore it to match analyze_tx
+	our_wallets = frozenset(sys.intern(w) for w in our_wallets)
+	buf = io.StringIO()
+	writer = csv.writer(buf)
+	row_count = 0
+	for row in build_rows_for_wallet(our_wallets, transactions, include_description):
+		writer.writerow(row)
+		row_count += 1
+	return buf.getvalue(), row_count
+
+
+async def export_wallets(api_key: str, wallets: List[str], our_wallets: FrozenSet[str], start_ms: Optional[int], end_ms: Optional[int], limit: int, output_path: str, cache: Optional[sqlite3.Connection] = None, rps: float = DEFAULT_RPS, workers: int = 1, include_description: bool = True) -> int:
+	"""Fetch all wallets concurrently over one pooled session and stream rows to CSV.
+	Signatures are listed for every wallet first; a transaction shared by several
+	of our wallets is only fetched and written under the first wallet listing it,
+	since rows are already computed relative to all of our_wallets. Each wallet's
+	rows are rendered as soon as its fetch completes, in a pool of `workers`
+	processes when workers > 1, and written in input order. All requests share
+	a limit of rps per second. Returns the number of rows written.
+	"""
+	loop = asyncio.get_running_loop()
+	pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+	limiter = make_limiter(rps)
+
+	async def fetch_and_render(session: aiohttp.ClientSession, signatures: List[str]) -> Tuple[str, int]:
+		transactions = await fetch_enriched_transactions(session, api_key, signatures, cache=cache, limiter=limiter)
+		if pool is None:
+			return render_rows_csv(our_wallets, transactions, include_description)
+		return await loop.run_in_executor(pool, render_rows_csv, our_wallets, transactions, include_description)
+
+	connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=DNS_CACHE_TTL)
+	try:
+		async with aiohttp.ClientSession(connector=connector) as session:
+			signature_lists = await tqdm.gather(
+				*(list_signatures(session, api_key, w, limit=limit, start_time_ms=start_ms, end_time_ms=end_ms, limiter=limiter) for w in wallets),
+				desc="Signatures",
+				mininterval=0.5,
+				leave=False,
+			)
+			seen_sigs: Set[str] = set()
+			pending: Deque[asyncio.Task] = deque()
+			for signatures in signature_lists:
+				fresh = [sig for sig in signatures if sig not in seen_sigs]
+				seen_sigs.update(fresh)
+				pending.append(asyncio.ensure_future(fetch_and_render(session, fresh)))
+			f = open_csv_output(output_path)
+			row_count = 0
+			try:
+				with tqdm(total=len(wallets), desc="Wallets", mininterval=1.0, smoothing=0, leave=False) as progress:
+					while pending:
+						chunk, chunk_rows = await pending.popleft()
+						f.write(chunk)
+						row_count += chunk_rows
+						progress.update(1)
+			finally:
+				for task in pending:
+					task.cancel()
+				f.close()
+	finally:
+		if pool is not None:
+			pool.shutdown(cancel_futures=True)
+	return row_count
 
 
 def main(argv: List[str]) -> int:
@@ -281,23 +525,31 @@ def main(argv: List[str]) -> int:
 	parser.add_argument("--start", dest="start", default=None, help="Start time ISO (inclusive)")
 	parser.add_argument("--end", dest="end", default=None, help="End time ISO (exclusive)")
 	parser.add_argument("--limit", dest="limit", type=int, default=1000, help="Max transactions per wallet to fetch")
+	parser.add_argument("--rps", dest="rps", type=float, default=DEFAULT_RPS, help="Max Helius requests per second, sized to your plan; fractions such as 0.5 are allowed")
+	parser.add_argument("--workers", dest="workers", type=int, default=1, help="Processes used to build CSV rows; default 1 builds them in-process, raise it for very large exports")
+	parser.add_argument("--no-description", dest="include_description", action="store_false", help="Leave the diagnostic description column empty")
+	parser.add_argument("--cache", dest="cache_path", default=DEFAULT_CACHE_PATH, help="Path to the enriched transaction cache")
+	parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Always fetch from Helius; do not read or write the cache")
 	args = parser.parse_args(argv)
+	if args.rps <= 0:
+		parser.error("--rps must be positive")
 
 	if not args.api_key:
 		raise SystemExit("Missing Helius API key. Provide --api-key or set HELIUS_API_KEY.")
 
 	wallets = load_wallets(args.wallets_path)
-	our_wallets: Set[str] = set(x.strip() for x in wallets)
+	# Interned to match the interned transfer accounts in analyze_tx
+	our_wallets: FrozenSet[str] = frozenset(sys.intern(x.strip()) for x in wallets)
 	start_ms = iso_to_unix_ms(args.start) if args.start else None
 	end_ms = iso_to_unix_ms(args.end) if args.end else None
 
-	all_rows: List[Dict[str, Any]] = []
-	for w in tqdm(wallets, desc="Wallets"):
-		rows = build_rows_for_wallet(args.api_key, w, our_wallets, start_ms, end_ms, limit=args.limit)
-		all_rows.extend(rows)
-
-	write_csv(all_rows, args.output_path)
-	print(f"Wrote {len(all_rows)} rows to {args.output_path}")
+	cache = open_tx_cache(args.cache_path) if args.use_cache else None
+	try:
+		row_count = asyncio.run(export_wallets(args.api_key, wallets, our_wallets, start_ms, end_ms, limit=args.limit, output_path=args.output_path, cache=cache, rps=args.rps, workers=args.workers, include_description=args.include_description))
+	finally:
+		if cache is not None:
+			cache.close()
+	print(f"Wrote {row_count} rows to {args.output_path}")
 	return 0
 
 